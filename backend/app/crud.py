@@ -1,7 +1,10 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
 from . import models, schemas
-from .database import mongo_db
+from .database import threat_logs
+from datetime import datetime
+from typing import List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -9,61 +12,67 @@ logger = logging.getLogger(__name__)
 
 # --- PostgreSQL Functions ---
 
-def get_threats(db: Session, skip: int = 0, limit: int = 100):
+async def get_threats(db: AsyncSession, cursor: Optional[datetime] = None, cursor_id: Optional[int] = None,
+                      limit: int = 100):
     """
     Retrieves a list of threats from the PostgreSQL database, newest first.
+    Pass the created_at and id of the last threat from the previous page as cursor and
+    cursor_id to get the next page. Both are needed because threats saved in the same
+    transaction share a created_at.
     """
     try:
-        return db.query(models.Threat).order_by(models.Threat.created_at.desc()).offset(skip).limit(limit).all()
+        query = select(models.Threat)
+        if cursor is not None and cursor_id is not None:
+            query = query.where(
+                tuple_(models.Threat.created_at, models.Threat.id) < tuple_(cursor, cursor_id)
+            )
+        result = await db.execute(
+            query.order_by(models.Threat.created_at.desc(), models.Threat.id.desc()).limit(limit)
+        )
+        return result.scalars().all()
     except SQLAlchemyError as e:
         logger.error(f"Error retrieving threats: {e}")
-        db.rollback()
+        await db.rollback()
         raise
 
 
-def create_threat(db: Session, threat_data: schemas.ThreatCreate):
+def _build_log_entry(db_threat: models.Threat) -> dict:
     """
-    Creates a new threat in the PostgreSQL database and logs the source URLs in MongoDB.
-    Returns the newly created threat object.
+    Builds the MongoDB log document mirroring a saved PostgreSQL threat.
+    """
+    return {
+        "postgres_id": db_threat.id,
+        "title": db_threat.title,
+        "source_urls": db_threat.source_urls,
+        "created_at": db_threat.created_at.isoformat() if db_threat.created_at else None,
+        "region": db_threat.region,
+        "countries": db_threat.countries,
+        "category": db_threat.category,
+        "description": db_threat.description,
+        "potential_impact": db_threat.potential_impact,
+        "date_mentioned": db_threat.date_mentioned
+    }
+
+
+async def _persist_threat(db: AsyncSession, db_threat: models.Threat) -> models.Threat:
+    """
+    Saves a threat ORM object to PostgreSQL and logs it in MongoDB.
+    Shared by create_threat and create_threat_safe. Returns the saved threat object.
     """
-    db_threat = None
     try:
-        # Create the main threat record in PostgreSQL
-        db_threat = models.Threat(
-            title=threat_data.title,
-            region=threat_data.region,
-            countries=threat_data.countries,
-            category=threat_data.category,
-            description=threat_data.description,
-            potential_impact=threat_data.potential_impact,
-            source_urls=threat_data.source_urls,
-            date_mentioned=threat_data.date_mentioned
-        )
-
         db.add(db_threat)
-        db.commit()
-        db.refresh(db_threat)
+        # id and created_at come back from the INSERT itself (eager_defaults), no refresh needed
+        await db.commit()
 
         logger.info(f"✅ Threat created in PostgreSQL: {db_threat.title} (ID: {db_threat.id})")
 
         # --- MongoDB Logging (with error handling) ---
         try:
-            log_entry = {
-                "postgres_id": db_threat.id,
-                "title": threat_data.title,
-                "source_urls": threat_data.source_urls,
-                "created_at": db_threat.created_at.isoformat() if db_threat.created_at else None,
-                "region": threat_data.region,
-                "countries": threat_data.countries,
-                "category": threat_data.category,
-                "description": threat_data.description,
-                "potential_impact": threat_data.potential_impact,
-                "date_mentioned": threat_data.date_mentioned
-            }
-
-            # Insert into MongoDB (synchronous operation)
-            result = mongo_db.threat_logs.insert_one(log_entry)
-            logger.info(f"✅ Threat logged to MongoDB: {result.inserted_id}")
+            log_entry = _build_log_entry(db_threat)
+
+            # Insert into MongoDB (async via Motor, doesn't block the event loop)
+            result = await threat_logs.insert_one(log_entry)
+            logger.info(f"✅ Threat log sent to MongoDB: {result.inserted_id}")
 
         except Exception as mongo_error:
             # Don't fail the whole operation if MongoDB logging fails
@@ -73,20 +82,46 @@ def create_threat(db: Session, threat_data: schemas.ThreatCreate):
 
     except SQLAlchemyError as e:
         logger.error(f"❌ PostgreSQL error creating threat: {e}")
-        db.rollback()
+        await db.rollback()
         raise
     except Exception as e:
         logger.error(f"❌ Unexpected error creating threat: {e}")
-        db.rollback()
+        await db.rollback()
         raise
 
 
-def create_threat_safe(db: Session, threat_data):
+async def create_threat(db: AsyncSession, threat_data: schemas.ThreatCreate):
     """
-    Safe version that handles ThreatReport objects directly (from rag_agent)
+    Creates a new threat in the PostgreSQL database and logs the source URLs in MongoDB.
+    Returns the newly created threat object.
+    """
+    # Create the main threat record in PostgreSQL
+    db_threat = models.Threat(
+        title=threat_data.title,
+        region=threat_data.region,
+        countries=threat_data.countries,
+        category=threat_data.category,
+        description=threat_data.description,
+        potential_impact=threat_data.potential_impact,
+        source_urls=threat_data.source_urls,
+        date_mentioned=threat_data.date_mentioned
+    )
+    return await _persist_threat(db, db_threat)
+
+
+async def create_threat_safe(db: AsyncSession, threat_data):
+    """
+    Safe version that handles ThreatReport objects directly (from rag_agent).
+    Single-threat entry point for external callers; the discovery runner uses create_threats_bulk.
     """
     try:
-        # Convert ThreatReport to dict if needed
+        # ThreatReports from rag_agent are already complete, so skip re-validating them
+        if isinstance(threat_data, schemas.ThreatReport):
+            return await _persist_threat(db, models.Threat(**threat_data.model_dump()))
+        if isinstance(threat_data, schemas.ThreatCreate):
+            return await create_threat(db, threat_data)
+
+        # Convert other objects to dict if needed
         if hasattr(threat_data, 'dict'):
             threat_dict = threat_data.dict()
         elif hasattr(threat_data, '__dict__'):
@@ -98,10 +133,62 @@ def create_threat_safe(db: Session, threat_data):
         threat_create = schemas.ThreatCreate(**threat_dict)
 
         # Use the main create function
-        return create_threat(db, threat_create)
+        return await create_threat(db, threat_create)
 
     except Exception as e:
         logger.error(f"❌ Error in create_threat_safe: {e}")
         logger.error(f"   Data type: {type(threat_data)}")
         logger.error(f"   Data: {threat_data}")
-        raise
\ No newline at end of file
+        raise
+
+
+async def create_threats_bulk(db: AsyncSession, reports) -> List[models.Threat]:
+    """
+    Creates a batch of threats in PostgreSQL with a single commit and logs them
+    to MongoDB with a single insert_many. Reports that fail validation are skipped.
+    Returns the list of newly created threat objects.
+    """
+    db_threats = []
+    for report in reports:
+        # ThreatReports from rag_agent (and ThreatCreates) are used as-is; plain dicts are validated
+        if isinstance(report, (schemas.ThreatReport, schemas.ThreatCreate)):
+            db_threats.append(models.Threat(**report.model_dump()))
+            continue
+
+        try:
+            threat_create = schemas.ThreatCreate(**report)
+        except Exception as e:
+            logger.error(f"❌ Skipping invalid threat report: {e}")
+            logger.error(f"   Data: {report}")
+            continue
+
+        db_threats.append(models.Threat(**threat_create.model_dump()))
+
+    if not db_threats:
+        return []
+
+    try:
+        db.add_all(db_threats)
+        # id and created_at come back from the INSERT itself (eager_defaults), no refresh needed
+        await db.commit()
+
+        logger.info(f"✅ {len(db_threats)} threats created in PostgreSQL")
+
+    except SQLAlchemyError as e:
+        logger.error(f"❌ PostgreSQL error creating threats: {e}")
+        await db.rollback()
+        raise
+
+    # --- MongoDB Logging (with error handling) ---
+    try:
+        log_entries = [_build_log_entry(db_threat) for db_threat in db_threats]
+
+        # One round trip for the whole batch; unordered so one bad document doesn't stop the rest
+        result = await threat_logs.insert_many(log_entries, ordered=False)
+        logger.info(f"✅ {len(result.inserted_ids)} threat logs sent to MongoDB")
+
+    except Exception as mongo_error:
+        # Don't fail the whole operation if MongoDB logging fails
+        logger.error(f"❌ MongoDB logging failed (but PostgreSQL save succeeded): {mongo_error}")
+
+    return db_threats
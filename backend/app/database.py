@@ -1,9 +1,10 @@
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from pymongo.mongo_client import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo.server_api import ServerApi
+from pymongo.write_concern import WriteConcern
 import os
 
 load_dotenv()
@@ -11,8 +12,32 @@ load_dotenv()
 # It reads the connection URL from the .env file
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# The .env holds a plain (libpq-style) postgresql:// URL; swap in the asyncpg driver for the async engine.
+# asyncpg rejects libpq-only query parameters, so sslmode is passed as asyncpg's "ssl" connect argument
+# (it accepts the same values, e.g. "require") and channel_binding, which asyncpg doesn't support, is dropped.
+_database_url = make_url(SQLALCHEMY_DATABASE_URL)
+_sslmode = _database_url.query.get("sslmode")
+ASYNC_DATABASE_URL = _database_url.difference_update_query(["sslmode", "channel_binding"]).set(
+    drivername="postgresql+asyncpg"
+)
+_connect_args = {"ssl": _sslmode} if _sslmode else {}
+
+# Multi-row INSERTs (e.g. a batch of discovered threats) are packed into as few
+# statements/round trips as possible via insertmanyvalues.
+# The pool is sized for concurrent API requests; pool_timeout makes an exhausted pool fail
+# fast instead of stalling requests, and pool_recycle drops connections before idle timeouts.
+engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    insertmanyvalues_page_size=500,
+    pool_size=20,
+    max_overflow=20,
+    pool_timeout=5,
+    pool_recycle=1800,
+    pool_pre_ping=True,
+    connect_args=_connect_args
+)
+# expire_on_commit=False so objects stay readable after commit without an implicit (sync) reload
+SessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
 
 # This is a base class that our database models will inherit from
 Base = declarative_base()
@@ -21,12 +46,17 @@ Base = declarative_base()
 # --- MongoDB Connection (for unstructured data/logs) ---
 MONGO_DATABASE_URL = os.getenv("MONGO_URL")
 
-# Create a client to connect to MongoDB
-mongo_client =  MongoClient(MONGO_DATABASE_URL, server_api=ServerApi('1'))
+# Create an asyncio client to connect to MongoDB (operations must be awaited)
+mongo_client = AsyncIOMotorClient(MONGO_DATABASE_URL, server_api=ServerApi('1'))
 
 # Get a specific database from MongoDB (e.g., "threat_db")
 mongo_db = mongo_client.maritime_threat_monitor
 
+# Collection handle for the logging path. The logs are a best-effort mirror of PostgreSQL
+# (the source of truth), so writes are fire-and-forget (w=0) instead of waiting for an ack.
+# Use mongo_db.threat_logs (default write concern) for anything read-critical.
+threat_logs = mongo_db.get_collection("threat_logs", write_concern=WriteConcern(w=0))
+
 # Send a ping to confirm a successful connection
 #try:
 #    mongo_client.admin.command('ping')
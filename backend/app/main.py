@@ -1,31 +1,36 @@
 import asyncio
+import hmac
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Depends, HTTPException, status, Header
+from fastapi import FastAPI, Depends, HTTPException, status, Header, Response
 import os
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 import logging
 
 from . import crud, models, schemas
-from .database import SessionLocal, engine
+from .database import SessionLocal, engine, mongo_db
 from .services import rag_agent
-from .services.teams_notifier import send_threat_to_teams
+from .services.teams_notifier import send_threat_to_teams, close_client as close_teams_client
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Read once at import; don't re-read the environment per request
 SECRET_KEY = os.getenv("API_SECRET_KEY")
 
 
 async def verify_secret_key(x_api_key: str = Header(..., description="API Secret Key")):
     """
     Dependency to verify the secret key provided in the X-API-Key header.
+    Uses a constant-time comparison; always rejects if no key is configured.
     """
-    if x_api_key != SECRET_KEY:
+    if not SECRET_KEY or not hmac.compare_digest(x_api_key.encode(), SECRET_KEY.encode()):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid API Key",
@@ -33,65 +38,91 @@ async def verify_secret_key(x_api_key: str = Header(..., description="API Secret
     return x_api_key
 
 
-# This queue will hold new threats to be sent to clients as notifications
-notification_queue = asyncio.Queue()
+# This queue will hold new threats (as JSON strings) to be sent to clients as notifications.
+# It is bounded so threats don't pile up indefinitely when no client is listening.
+notification_queue = asyncio.Queue(maxsize=500)
+
+# Maximum number of Teams webhook requests in flight at once
+TEAMS_MAX_CONCURRENCY = 8
+
+# Ensures only one threat discovery run is in progress at a time
+_discovery_lock = asyncio.Lock()
 
 # Global scheduler instance
 scheduler: AsyncIOScheduler = None
 
 
 # --- Database Dependency ---
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
 # --- Background Task (The Agent Runner) ---
+async def _send_teams_notification(semaphore: asyncio.Semaphore, threat: schemas.Threat) -> bool:
+    """Sends a single Teams notification once a concurrency slot is free."""
+    async with semaphore:
+        return await send_threat_to_teams(threat)
+
+
 async def run_threat_discovery_and_save():
     """Background task to discover and save maritime threats"""
-    logger.info("Scheduler triggered: Starting RAG agent to discover threats...")
+    # Serialize runs (scheduled and manual) so overlapping triggers queue up instead of interleaving
+    async with _discovery_lock:
+        logger.info("Scheduler triggered: Starting RAG agent to discover threats...")
 
-    # Create a new database session for this background task
-    db = SessionLocal()
-    try:
-        threat_reports = await rag_agent.find_maritime_threats()
-        if not threat_reports:
-            logger.info("Agent finished: No new threats found.")
-            return
+        # Create a new database session for this background task
+        db = SessionLocal()
+        try:
+            threat_reports = await rag_agent.find_maritime_threats()
+            if not threat_reports:
+                logger.info("Agent finished: No new threats found.")
+                return
 
-        logger.info(f"Found {len(threat_reports)} potential threats")
+            logger.info(f"Found {len(threat_reports)} potential threats")
 
-        for report in threat_reports:
-            try:
-                # Create threat in database
-                new_threat_orm = crud.create_threat_safe(db=db, threat_data=report)
-                logger.info(f"New threat saved to DB: {new_threat_orm.title}")
+            # Save the whole batch at once (single PostgreSQL commit, single MongoDB insert)
+            new_threats_orm = await crud.create_threats_bulk(db=db, reports=threat_reports)
+            logger.info(f"Saved {len(new_threats_orm)} new threats to DB")
 
-                # Convert to Pydantic schema for notifications
-                new_threat_schema = schemas.Threat.model_validate(new_threat_orm)
+            new_threat_schemas = []
+            for new_threat_orm in new_threats_orm:
+                try:
+                    # Convert to Pydantic schema for notifications
+                    new_threat_schema = schemas.Threat.model_validate(new_threat_orm)
 
-                # Add to notification queue
-                await notification_queue.put(new_threat_schema)
+                    # Add the pre-serialized JSON to the notification queue
+                    # (drop the notification rather than block if it's full)
+                    try:
+                        notification_queue.put_nowait(new_threat_schema.model_dump_json())
+                    except asyncio.QueueFull:
+                        logger.warning(f"Notification queue full, dropping notification for threat: {new_threat_orm.title}")
 
-                # Send Teams notification
-                try:
-                    await send_threat_to_teams(new_threat_schema)
-                    logger.info(f"Teams notification sent for threat: {new_threat_orm.title}")
-                except Exception as e:
-                    logger.error(f"Failed to send Teams notification: {e}")
+                    new_threat_schemas.append(new_threat_schema)
 
-            except Exception as e:
-                logger.error(f"Error processing threat report: {e}")
-                continue
+                except Exception as e:
+                    logger.error(f"Error processing threat report: {e}")
+                    continue
+
+            # Send Teams notifications concurrently, capped to stay within webhook rate limits
+            semaphore = asyncio.Semaphore(TEAMS_MAX_CONCURRENCY)
+            results = await asyncio.gather(
+                *(_send_teams_notification(semaphore, threat) for threat in new_threat_schemas),
+                return_exceptions=True
+            )
+            for threat, result in zip(new_threat_schemas, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Failed to send Teams notification for threat {threat.title}: {result}")
+                elif result:
+                    logger.info(f"Teams notification sent for threat: {threat.title}")
+                else:
+                    logger.info(f"Teams notification skipped for threat: {threat.title}")
 
-    except Exception as e:
-        logger.error(f"Error in threat discovery process: {e}")
-    finally:
-        db.close()
-        logger.info("Threat discovery process completed")
+        except Exception as e:
+            logger.error(f"Error in threat discovery process: {e}")
+        finally:
+            await db.close()
+            logger.info("Threat discovery process completed")
 
 
 # --- Lifespan Event Handler ---
@@ -101,12 +132,29 @@ async def lifespan(app: FastAPI):
     logger.info("Application startup initiated.")
 
     try:
-        # 1. Create database tables
-        logger.info("Creating database tables...")
-        models.Base.metadata.create_all(bind=engine)
-        logger.info("Database tables created/verified.")
+        # 1. Create database tables (skip the DDL round trips if the schema already exists)
+        async with engine.connect() as conn:
+            tables_exist = await conn.run_sync(
+                lambda sync_conn: inspect(sync_conn).has_table(models.Threat.__tablename__)
+            )
+        if tables_exist:
+            # Indexes added to the model later are applied by the one-off scripts in migrations/
+            logger.info("Database tables already exist, skipping creation.")
+        else:
+            logger.info("Creating database tables...")
+            async with engine.begin() as conn:
+                await conn.run_sync(models.Base.metadata.create_all)
+            logger.info("Database tables created.")
+
+        # 2. Ensure MongoDB log indexes (logging is best-effort, so don't block startup on failure)
+        try:
+            await mongo_db.threat_logs.create_index([("postgres_id", 1)], background=True)
+            await mongo_db.threat_logs.create_index([("created_at", -1)], background=True)
+            logger.info("MongoDB indexes created/verified.")
+        except Exception as e:
+            logger.error(f"Failed to create MongoDB indexes: {e}")
 
-        # 2. Initialize and start the scheduler
+        # 3. Initialize and start the scheduler
         global scheduler
         scheduler = AsyncIOScheduler()
 
@@ -117,7 +165,9 @@ async def lifespan(app: FastAPI):
             id='threat_discovery_job',
             name='Daily Threat Discovery',
             replace_existing=True,
-            max_instances=1  # Prevent overlapping runs
+            max_instances=1,  # Prevent overlapping runs
+            misfire_grace_time=3600,  # Still run if the trigger fired up to an hour late
+            coalesce=True  # Collapse a backlog of missed runs into a single run
         )
 
         # For testing - add a job that runs every 5 minutes (remove in production)
@@ -149,6 +199,8 @@ async def lifespan(app: FastAPI):
         if scheduler and scheduler.running:
             scheduler.shutdown(wait=True)
             logger.info("Scheduler stopped.")
+        await close_teams_client()
+        logger.info("Teams HTTP client closed.")
     except Exception as e:
         logger.error(f"Error during shutdown: {e}")
 
@@ -191,30 +243,51 @@ def health_check():
     }
 
 
-@app.get("/api/threats/", response_model=List[schemas.Threat])
-def get_all_threats(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+@app.get("/api/threats/", response_model=List[schemas.ThreatRead])
+async def get_all_threats(cursor: Optional[datetime] = None, cursor_id: Optional[int] = None, limit: int = 100,
+                          db: AsyncSession = Depends(get_db)):
     """
-    Endpoint to get a list of all threats from the database.
+    Endpoint to get a list of all threats from the database, newest first.
+    To page through results, pass the created_at and id of the last threat received
+    as cursor and cursor_id.
     """
-    threats = crud.get_threats(db, skip=skip, limit=limit)
-    return threats
+    if (cursor is None) != (cursor_id is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="cursor and cursor_id must be provided together",
+        )
+    threats = await crud.get_threats(db, cursor=cursor, cursor_id=cursor_id, limit=limit)
+    # Rows from the DB are already well-formed, so build the read models without validation
+    # and serialize the list in one pass (returning a Response skips FastAPI's re-validation)
+    fields = schemas.ThreatRead.model_fields
+    threat_reads = [
+        schemas.ThreatRead.model_construct(**{name: getattr(row, name) for name in fields})
+        for row in threats
+    ]
+    return Response(
+        content=schemas.threat_read_list_adapter.dump_json(threat_reads),
+        media_type="application/json"
+    )
 
 
 # --- Real-Time Notification Endpoint ---
 from sse_starlette.sse import EventSourceResponse
-import json
 
 
 async def notification_generator():
     """
-    Yields new threats from the queue as they arrive.
+    Yields new threats from the queue as they arrive, batching any that are
+    already waiting into a single JSON list per event. Keep-alive pings are
+    sent by EventSourceResponse.
     """
     while True:
         try:
-            # Wait for a new threat to appear in the queue
-            new_threat = await notification_queue.get()
-            # Send the threat data as a JSON string
-            yield json.dumps(new_threat.dict())
+            # Wait for a new threat to appear in the queue, then drain whatever else is pending
+            batch = [await notification_queue.get()]
+            while not notification_queue.empty():
+                batch.append(notification_queue.get_nowait())
+            # Queue items are already JSON strings, so just join them into a JSON list
+            yield {"data": "[" + ",".join(batch) + "]"}
         except asyncio.CancelledError:
             logger.info("Client disconnected from notifications.")
             break
@@ -228,7 +301,8 @@ async def stream_notifications():
     """
     Endpoint for clients to subscribe to real-time threat notifications.
     """
-    return EventSourceResponse(notification_generator())
+    # The library sends keep-alive pings and drops clients that stop reading
+    return EventSourceResponse(notification_generator(), ping=15, send_timeout=5)
 
 
 @app.get("/api/discover-threats", dependencies=[Depends(verify_secret_key)])
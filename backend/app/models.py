@@ -1,9 +1,11 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Index
 from sqlalchemy.sql import func
 from .database import Base
 
 class Threat(Base):
     __tablename__ = "threats"
+    # Fetch server-generated defaults (created_at) via INSERT ... RETURNING instead of a follow-up SELECT
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
@@ -18,3 +20,8 @@ class Threat(Base):
     source_urls = Column(JSON)
     date_mentioned = Column(String)  # Date when the threat was mentioned in the sources
 
+    # Supports newest-first keyset pagination on (created_at, id) in crud.get_threats
+    __table_args__ = (
+        Index("ix_threats_created_at_desc", created_at.desc(), id.desc()),
+    )
+
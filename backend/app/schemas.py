@@ -1,8 +1,28 @@
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, field_validator
 from datetime import datetime
 from typing import List, Optional
 
 
+def clean_str_list(v):
+    """
+    Normalizes a list-of-strings field (countries, source_urls) for storage.
+    Shared by ThreatCreate and the rag_agent report post-processing.
+    """
+    if v is None:
+        return None  # Keep as None/NULL in database
+    if v == []:
+        return []  # Empty list is valid
+    if isinstance(v, str):
+        if v.strip() == "":
+            return None  # Empty string becomes None
+        return [v]  # Single string becomes list
+    if isinstance(v, list):
+        # Filter out None values and empty strings
+        filtered = [item for item in v if item and isinstance(item, str) and item.strip()]
+        return filtered if filtered else None
+    return v  # Anything else is left for normal validation to reject
+
+
 # Base properties for a threat
 class ThreatBase(BaseModel):
     title: str
@@ -15,49 +35,48 @@ class ThreatBase(BaseModel):
     source_urls: Optional[List[str]] = Field(default=None, description="List of source URLs or None")
     date_mentioned: str
 
+
+# Properties needed to create a new threat.
+# The normalizing validators only run on this write path; data read back from the DB is already clean.
+class ThreatCreate(ThreatBase):
     @field_validator('countries', mode='before')
     @classmethod
     def validate_countries(cls, v):
         """Handle countries field - accepts None, empty list, single string, or list of strings"""
-        if v is None:
-            return None  # Keep as None/NULL in database
-        if v == []:
-            return []  # Empty list is valid
-        if isinstance(v, str):
-            if v.strip() == "":
-                return None  # Empty string becomes None
-            return [v]  # Single string becomes list
-        if isinstance(v, list):
-            # Filter out empty strings and None values
-            filtered = [country for country in v if country and isinstance(country, str) and country.strip()]
-            return filtered if filtered else None
-        return v
+        return clean_str_list(v)
 
     @field_validator('source_urls', mode='before')
     @classmethod
     def validate_source_urls(cls, v):
-        """Handle source_urls field - accepts None or list of strings"""
-        if v is None:
-            return None
-        if v == []:
-            return []
-        if isinstance(v, list):
-            # Filter out None and empty strings
-            filtered = [url for url in v if url and isinstance(url, str) and url.strip()]
-            return filtered if filtered else None
-        return v
-
-
-# Properties needed to create a new threat
-class ThreatCreate(ThreatBase):
-    pass
+        """Handle source_urls field - accepts None, empty list, single string, or list of strings"""
+        return clean_str_list(v)
 
 
 # Properties to be returned when reading a threat from the API
-class Threat(ThreatBase):
+class ThreatRead(ThreatBase):
     id: int
     created_at: datetime
 
     # This allows the model to be created from a database object
-    class Config:
-        from_attributes = True
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+
+# Structure of the report we want the AI agent (services/rag_agent) to generate.
+# Lives here so the data layer can use it without importing the LLM module.
+class ThreatReport(BaseModel):
+    """Data structure for a single identified threat."""
+    title: str = Field(description="A concise, informative title for the threat.")
+    region: str = Field(description="The geographical region the threat applies to (e.g., Red Sea, Strait of Malacca).")
+    countries: List[str] = Field(description="List of countries affected by the threat.")
+    category: str = Field(description="The category of the threat (e.g., Piracy, Military Conflict, Sanctions, Terrorist Attack).")
+    description: str = Field(description="A detailed description of the threat based on the sources found.")
+    potential_impact: str = Field(description="The potential impact of the threat on the maritime industry.")
+    source_urls: List[str] = Field(description="A list of URLs for the sources used to identify the threat.")
+    date_mentioned: str = Field(description="The date when the threat was mentioned in the sources. Usually a date on top for the article.")
+
+
+# Kept as the name used by the notification path (SSE queue, Teams)
+Threat = ThreatRead
+
+# Builds the serializer for a list of threats once, for the /api/threats/ response
+threat_read_list_adapter = TypeAdapter(List[ThreatRead])
\ No newline at end of file
@@ -1,29 +1,35 @@
 import os
-import json
 import re
+import logging
+import orjson
 from dotenv import load_dotenv
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_tavily import TavilySearch
 from langchain.agents import AgentExecutor, create_tool_calling_agent
 from langchain_core.prompts import ChatPromptTemplate
-from pydantic import BaseModel, Field
+from pydantic import ValidationError
 from typing import List
+from ..schemas import ThreatReport, clean_str_list
 
 # Load .env file only if it exists (for local development)
 if os.path.exists('.env'):
     load_dotenv()
 
-# This class defines the structure of the report we want the AI to generate.
-class ThreatReport(BaseModel):
-    """Data structure for a single identified threat."""
-    title: str = Field(description="A concise, informative title for the threat.")
-    region: str = Field(description="The geographical region the threat applies to (e.g., Red Sea, Strait of Malacca).")
-    countries: List[str] = Field(description="List of countries affected by the threat.")
-    category: str = Field(description="The category of the threat (e.g., Piracy, Military Conflict, Sanctions, Terrorist Attack).")
-    description: str = Field(description="A detailed description of the threat based on the sources found.")
-    potential_impact: str = Field(description="The potential impact of the threat on the maritime industry.")
-    source_urls: List[str] = Field(description="A list of URLs for the sources used to identify the threat.")
-    date_mentioned: str = Field(description="The date when the threat was mentioned in the sources. Usually a date on top for the article.")
+logger = logging.getLogger(__name__)
+
+# Matches the JSON object inside a ```json fenced block of the agent's output
+_FENCE_RE = re.compile(r"```(?:json)?\s*(\{.*?\})\s*```", re.DOTALL)
+
+# Fallback values for fields the LLM left out of a report (or returned as null);
+# list fields are handled separately so reports never share a mutable default
+_DEFAULTS = {
+    'title': 'Unknown Threat',
+    'region': 'Unknown',
+    'category': 'Unknown',
+    'description': 'No description available',
+    'potential_impact': 'Impact unknown',
+    'date_mentioned': 'Not specified',
+}
 
 # Get API key from environment variables
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
@@ -116,52 +122,42 @@ async def find_maritime_threats() -> List[ThreatReport]:
         raw_output = response.get("output", "{}")
 
         # Extract JSON content from a ```json fenced block using regex
-        match = re.search(r"```(?:json)?\s*(\{.*?\})\s*```", raw_output, re.DOTALL)
+        match = _FENCE_RE.search(raw_output)
         if match:
             json_str = match.group(1)
-            output_data = json.loads(json_str)
+            output_data = orjson.loads(json_str)
         else:
             # Fall back to normal loading (if no code block found)
-            output_data = json.loads(raw_output)
+            output_data = orjson.loads(raw_output)
 
         report_list = output_data.get("reports", [])
 
-        # ADD FALLBACK HERE - Before creating ThreatReport objects
-        print("🔍 DEBUG: Processing reports...")
+        # Fill in defaults for any missing fields and normalize the list fields before creating
+        # ThreatReport objects. The list filtering is shared with schemas.ThreatCreate, but
+        # ThreatReport requires real lists, so this path deliberately keeps its own fallbacks:
+        # no countries -> ['Unknown'] and no source URLs -> [] (ThreatCreate stores None for both)
+        threats = []
         for i, report in enumerate(report_list):
-            print(f"Report {i} before processing: {report}")
-
-            # Handle missing or empty countries field
-            if 'countries' not in report or not report['countries']:
-                report['countries'] = ['Unknown']
-                print(f"  ✅ Added default countries: {report['countries']}")
-            elif isinstance(report['countries'], str):
-                # If AI returned a string instead of list, convert it
-                report['countries'] = [report['countries']]
-                print(f"  ✅ Converted string to list: {report['countries']}")
-
-            # Ensure all required fields exist with defaults
-            if 'title' not in report:
-                report['title'] = 'Unknown Threat'
-            if 'region' not in report:
-                report['region'] = 'Unknown'
-            if 'category' not in report:
-                report['category'] = 'Unknown'
-            if 'description' not in report:
-                report['description'] = 'No description available'
-            if 'potential_impact' not in report:
-                report['potential_impact'] = 'Impact unknown'
-            if 'source_urls' not in report:
-                report['source_urls'] = []
-            if 'date_mentioned' not in report:
-                report['date_mentioned'] = 'Not specified'
-
-            print(f"Report {i} after processing: {report}")
-
-        # Convert the raw dictionaries into our ThreatReport Pydantic models
-        return [ThreatReport(**report) for report in report_list]
-
-    except (json.JSONDecodeError, TypeError) as e:
-        print(f"Error: Could not parse LLM response. Error: {e}")
-        print(f"Received response: {response.get('output')}")
+            if not isinstance(report, dict):
+                logger.error(f"Skipping threat report {i}: expected an object, got {type(report).__name__}")
+                continue
+
+            report = {**_DEFAULTS, **{key: value for key, value in report.items() if value is not None}}
+            report['countries'] = clean_str_list(report.get('countries')) or ['Unknown']
+            report['source_urls'] = clean_str_list(report.get('source_urls')) or []
+
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Report %d after processing: %s", i, report)
+
+            # LLM output isn't trusted, so validate each report once here; crud then uses it as-is
+            try:
+                threats.append(ThreatReport(**report))
+            except ValidationError as e:
+                logger.error(f"Skipping invalid threat report {i}: {e}")
+
+        return threats
+
+    except (orjson.JSONDecodeError, TypeError) as e:
+        logger.error(f"Error: Could not parse LLM response. Error: {e}")
+        logger.error(f"Received response: {response.get('output')}")
         return []
\ No newline at end of file
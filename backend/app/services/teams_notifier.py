@@ -1,18 +1,48 @@
 import os
 import httpx
+from typing import Optional
 from .. import schemas
 
 # Get the webhook URL from our environment variables
 TEAMS_WEBHOOK_URL = os.getenv("TEAMS_WEBHOOK_URL")
 
-async def send_threat_to_teams(threat: schemas.Threat):
+# Shared client so the TCP/TLS connection to the webhook is reused across notifications
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    """
+    Returns the shared HTTP client, creating it on first use.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=20),
+            timeout=10.0
+        )
+    return _client
+
+
+async def close_client():
+    """
+    Closes the shared HTTP client. Called on application shutdown.
+    """
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def send_threat_to_teams(threat: schemas.Threat) -> bool:
     """
     Formats a threat notification and sends it to a Microsoft Teams channel
     using an Incoming Webhook.
+    Returns True if sent, False if skipped (no webhook configured); re-raises send errors.
     """
     if not TEAMS_WEBHOOK_URL:
         print("Warning: TEAMS_WEBHOOK_URL is not set. Skipping notification.")
-        return
+        return False
 
     # We will use an "Adaptive Card" for a rich, well-formatted message.
     # This is a standard JSON format that Teams understands.
@@ -86,12 +116,14 @@ async def send_threat_to_teams(threat: schemas.Threat):
     }
 
     # Send the POST request to the Teams webhook URL
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(TEAMS_WEBHOOK_URL, json=card_payload)
-            response.raise_for_status()  # Raises an exception for 4xx/5xx responses
-            print(f"Successfully sent notification to Teams for threat ID: {threat.id}")
-        except httpx.HTTPStatusError as e:
-            print(f"Error sending notification to Teams: {e.response.status_code} - {e.response.text}")
-        except Exception as e:
-            print(f"An unexpected error occurred while sending Teams notification: {e}")
\ No newline at end of file
+    try:
+        response = await _get_client().post(TEAMS_WEBHOOK_URL, json=card_payload)
+        response.raise_for_status()  # Raises an exception for 4xx/5xx responses
+        print(f"Successfully sent notification to Teams for threat ID: {threat.id}")
+        return True
+    except httpx.HTTPStatusError as e:
+        print(f"Error sending notification to Teams: {e.response.status_code} - {e.response.text}")
+        raise
+    except Exception as e:
+        print(f"An unexpected error occurred while sending Teams notification: {e}")
+        raise
\ No newline at end of file
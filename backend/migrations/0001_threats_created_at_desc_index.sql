@@ -0,0 +1,5 @@
+-- One-off deploy step for databases created before ix_threats_created_at_desc existed
+-- (create_all only builds it for new tables). Backs keyset pagination in crud.get_threats.
+-- CONCURRENTLY avoids locking the live table; run it outside a transaction, e.g.:
+--   psql "$DATABASE_URL" -f migrations/0001_threats_created_at_desc_index.sql
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_threats_created_at_desc ON threats (created_at DESC, id DESC);
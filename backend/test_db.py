@@ -1,12 +1,15 @@
-from app.database import engine, mongo_client, mongo_db
+from app.database import engine, MONGO_DATABASE_URL
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.server_api import ServerApi
 from sqlalchemy import text
+import asyncio
 import sys
 
 
-def test_postgresql():
+async def test_postgresql():
     try:
-        with engine.connect() as connection:
-            result = connection.execute(text("SELECT version()"))
+        async with engine.connect() as connection:
+            result = await connection.execute(text("SELECT version()"))
             version = result.fetchone()[0]
             print("✅ PostgreSQL connected successfully!")
             print(f"   Version: {version[:50]}...")
@@ -16,13 +19,16 @@ def test_postgresql():
         return False
 
 
-def test_mongodb():
+async def test_mongodb():
+    # Create the client inside the running event loop so it's bound to it
+    mongo_client = AsyncIOMotorClient(MONGO_DATABASE_URL, server_api=ServerApi('1'))
+    mongo_db = mongo_client.maritime_threat_monitor
     try:
         # Test connection
-        mongo_client.admin.command('ping')
+        await mongo_client.admin.command('ping')
 
         # Test database access
-        collections = mongo_db.list_collection_names()
+        collections = await mongo_db.list_collection_names()
         print("✅ MongoDB connected successfully!")
         print(f"   Database: {mongo_db.name}")
         print(f"   Collections: {collections if collections else 'No collections yet'}")
@@ -30,13 +36,22 @@ def test_mongodb():
     except Exception as e:
         print(f"❌ MongoDB connection failed: {e}")
         return False
+    finally:
+        mongo_client.close()
+
+
+async def run_checks():
+    # Run both checks in a single event loop
+    pg_success = await test_postgresql()
+    mongo_success = await test_mongodb()
+    await engine.dispose()
+    return pg_success, mongo_success
 
 
 if __name__ == "__main__":
     print("Testing database connections...\n")
 
-    pg_success = test_postgresql()
-    mongo_success = test_mongodb()
+    pg_success, mongo_success = asyncio.run(run_checks())
 
     print(f"\n{'=' * 50}")
     if pg_success and mongo_success: